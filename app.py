@@ -1,19 +1,24 @@
 import os
+import glob
 import json
+import time
+import hashlib
+import numpy as np
 import pandas as pd
 import streamlit as st
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from dotenv import load_dotenv, set_key, find_dotenv
 from main import (
+    CONFIG,
     fetch_all_models,
     extract_specialties,
     calculate_effectiveness,
     extract_params,
-    format_release_date,
-    is_free_or_preview,
+    free_or_preview_mask,
 )
 try:
-    from streamlit_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode
+    from st_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode, JsCode
     AGGRID_AVAILABLE = True
 except ImportError:
     AGGRID_AVAILABLE = False
@@ -25,8 +30,6 @@ load_dotenv()
 __version__ = "0.1.0"
 
 # Initialize session state variables
-if "model_data" not in st.session_state:
-    st.session_state.model_data = []
 if "selected_models" not in st.session_state:
     st.session_state.selected_models = []
 
@@ -38,19 +41,18 @@ st.set_page_config(
 )
 
 # ---- Minimal CSS for header and cards ----
-st.markdown(
-    """
-    <style>
-    .header-container { display: flex; align-items: center; margin-bottom: 1rem; }
-    .header-logo { font-size: 2rem; margin-right: 0.5rem; }
-    .header-title { font-size: 2rem; font-weight: bold; }
-    .metric-card { background-color: #2e3136; border-radius: 8px; padding: 1rem; text-align: center; }
-    .metric-label { font-size: 0.85rem; color: #cccccc; }
-    .metric-value { font-size: 1.5rem; font-weight: bold; color: #ffffff; }
-    </style>
-    """,
-    unsafe_allow_html=True,
-)
+# Class selectors only, so the browser matches them without scanning the tree
+_CSS = """
+<style>
+.header-container { display: flex; align-items: center; margin-bottom: 1rem; }
+.header-logo { font-size: 2rem; margin-right: 0.5rem; }
+.header-title { font-size: 2rem; font-weight: bold; }
+.metric-card { background-color: #2e3136; border-radius: 8px; padding: 1rem; text-align: center; }
+.metric-label { font-size: 0.85rem; color: #cccccc; }
+.metric-value { font-size: 1.5rem; font-weight: bold; color: #ffffff; }
+</style>
+"""
+st.markdown(_CSS, unsafe_allow_html=True)
 
 # ---- Sidebar ----
 with st.sidebar:
@@ -69,35 +71,20 @@ with st.sidebar:
         help="Get your key from https://openrouter.ai/keys",
     )
     if st.button("Save API Key"):
-        dotenv_path = find_dotenv()
-        if not dotenv_path:
-            # Create .env file if it doesn't exist
-            dotenv_path = ".env"
-            with open(dotenv_path, "w") as f:
-                pass
-        set_key(dotenv_path, "OPENROUTER_API_KEY", api_key)
-        os.environ["OPENROUTER_API_KEY"] = api_key
-        st.success("API key saved!")
-
-    st.markdown("---")
-    st.header("🔍 Filters")
-    
-    # Initialize filter state variables
-    if "min_score" not in st.session_state:
-        st.session_state.min_score = 8.5
-    if "capabilities" not in st.session_state:
-        st.session_state.capabilities = ["Code", "Reason", "Tools"]
-    if "search" not in st.session_state:
-        st.session_state.search = ""
-        
-    min_score = st.slider("Minimum Effectiveness Score", 0.0, 10.0, st.session_state.min_score, 0.1, key="min_score_slider")
-    capabilities = st.multiselect(
-        "Capabilities",
-        ["Code", "Reason", "Tools"],
-        default=st.session_state.capabilities,
-        key="capabilities_select"
-    )
-    search = st.text_input("Search models", value=st.session_state.search, key="search_input")
+        if api_key == existing_key:
+            # Nothing to write, and the cached catalog is still valid
+            st.toast("Key unchanged")
+        else:
+            dotenv_path = find_dotenv()
+            if not dotenv_path:
+                # Create .env file if it doesn't exist
+                dotenv_path = ".env"
+                with open(dotenv_path, "w") as f:
+                    pass
+            set_key(dotenv_path, "OPENROUTER_API_KEY", api_key)
+            # The catalog cache is keyed on this value, so the new key refetches
+            os.environ["OPENROUTER_API_KEY"] = api_key
+            st.success("API key saved!")
 
     st.markdown("---")
     st.header("📋 Legend")
@@ -120,160 +107,389 @@ with col1:
 with col2:
     refresh = st.button("🔄 Refresh", key="refresh_button")
 
-# Fetch & cache models
-if refresh or len(st.session_state.model_data) == 0:
-    with st.spinner("Loading models..."):
-        st.session_state.model_data = fetch_all_models()
-models = st.session_state.model_data
-
-# Compute key subsets
-free_models = [m for m in models if is_free_or_preview(m)]
-relevant_models = [
-    m
-    for m in free_models
-    if any(
-        s in extract_specialties(m.get("description", ""), m.get("architecture", {}))
-        for s in ["coding", "reasoning", "tool_calling"]
-    )
-]
+@st.cache_resource
+def _fetch_executor():
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix="models-fetch")
 
-# Metrics cards
-col1, col2, col3 = st.columns(3)
-with col1:
-    st.markdown(
-        f"<div class='metric-card'><div class='metric-label'>Total Models</div>"
-        f"<div class='metric-value'>{len(models)}</div></div>",
-        unsafe_allow_html=True,
+def render_metrics(total, free, relevant):
+    """Render the three summary cards."""
+    cards = zip(
+        st.columns(3),
+        ("Total Models", "Free & Preview", "Relevant Capabilities"),
+        (total, free, relevant),
     )
-with col2:
-    st.markdown(
-        f"<div class='metric-card'><div class='metric-label'>Free & Preview</div>"
-        f"<div class='metric-value'>{len(free_models)}</div></div>",
-        unsafe_allow_html=True,
-    )
-with col3:
-    st.markdown(
-        f"<div class='metric-card'><div class='metric-label'>Relevant Capabilities</div>"
-        f"<div class='metric-value'>{len(relevant_models)}</div></div>",
-        unsafe_allow_html=True,
-    )
-st.caption(f"Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    for col, label, value in cards:
+        with col:
+            st.markdown(
+                f"<div class='metric-card'><div class='metric-label'>{label}</div>"
+                f"<div class='metric-value'>{value}</div></div>",
+                unsafe_allow_html=True,
+            )
 
 # Build DataFrame
-def make_dataframe(models):
-    rows = []
-    for model in models:
-        if not is_free_or_preview(model):
-            continue
-        specs = extract_specialties(model.get("description", ""), model.get("architecture", {}))
-        caps = []
-        if "coding" in specs:
-            caps.append("🖥️ Code")
-        if "reasoning" in specs:
-            caps.append("🤔 Reason")
-        if "tool_calling" in specs:
-            caps.append("🔧 Tools")
-        rows.append(
-            {
-                "Provider": (model.get("id", "").split("/")[0] or "").capitalize(),
-                "Name": model.get("name", ""),
-                "Model ID": model.get("id", ""),
-                "Params": f"{extract_params(model.get('name',''), model.get('description','')) or 'N/A'}",
-                "Score": round(calculate_effectiveness(model), 1),
-                "Release": format_release_date(model.get("created")),
-                "Capabilities": " • ".join(caps),
-            }
-        )
-    df = pd.DataFrame(rows)
-    if not df.empty:
-        df = df.sort_values("Score", ascending=False).reset_index(drop=True)
+_MODEL_COLUMNS = ["id", "name", "description", "architecture", "pricing", "created"]
+# Display label per specialty, in display order; position n is bit 1 << n
+_CAP_STRINGS = {"coding": "🖥️ Code", "reasoning": "🤔 Reason", "tool_calling": "🔧 Tools"}
+_CAP_BITS = {spec: 1 << n for n, spec in enumerate(_CAP_STRINGS)}
+# Capability label for every (code, reason, tools) combination, indexed by bitmask
+_CAP_LABELS = np.array([
+    " • ".join(label for bit, label in enumerate(_CAP_STRINGS.values()) if i >> bit & 1)
+    for i in range(8)
+])
+
+# Display names for provider prefixes that plain capitalization gets wrong;
+# built once here rather than per model
+_PROVIDER_MAP = {
+    "anthropic": "Anthropic",
+    "google": "Google",
+    "mistralai": "Mistral AI",
+    "meta": "Meta",
+    "openai": "OpenAI",
+    "meta-llama": "Meta",
+    "cohere": "Cohere",
+    "perplexity": "Perplexity AI",
+    "claude": "Anthropic",
+    "fireworks": "Fireworks AI",
+    "deepseek": "DeepSeek",
+    "01-ai": "01 AI",
+    "azure": "Microsoft Azure",
+    "gpt4all": "GPT4All",
+    "neuroengine": "Neuroengine",
+    "huggingface": "Hugging Face",
+    "together": "Together AI",
+    "databricks": "Databricks",
+    "deepinfra": "DeepInfra",
+    "groq": "Groq",
+    "nvidia": "NVIDIA",
+    "inflection": "Inflection AI",
+    "amazon": "Amazon",
+    "apple": "Apple",
+    "mancer": "Mancer",
+    "undi95": "Undi95",
+    "openchat": "OpenChat",
+}
+
+# Filter-only columns carried on the table but never shown or exported
+_HELPER_COLUMNS = ["_code", "_reason", "_tools", "_haystack"]
+# Capability filter option -> helper column
+_CAP_KEYS = {"Code": "_code", "Reason": "_reason", "Tools": "_tools"}
+# Below this many rows a plain list comprehension beats pandas string kernels
+_SMALL_TABLE = 200
+
+def _arrow_strings(df):
+    """Arrow-backed strings: native contains/lower kernels and a compact layout.
+
+    read_parquet hands these back as string[python], so both paths call this.
+    """
+    for col in ["Name", "Model ID", "_haystack"]:
+        df[col] = df[col].astype("string[pyarrow]")
     return df
 
-df = make_dataframe(models)
-
-# Apply sidebar filters
-filtered_df = df.copy()
-if not filtered_df.empty:
-    filtered_df = filtered_df[filtered_df["Score"] >= min_score]
-    # Capability filter
-    if capabilities:
-        mask = pd.Series(False, index=filtered_df.index)
-        for cap in capabilities:
-            key = {
-                "Code": "Code",
-                "Reason": "Reason",
-                "Tools": "Tools",
-            }[cap]
-            mask |= filtered_df["Capabilities"].str.contains(key)
-        filtered_df = filtered_df[mask]
-    # Search filter
-    if search:
-        s = search.lower()
-        filtered_df = filtered_df[
-            filtered_df["Name"].str.lower().str.contains(s)
-            | filtered_df["Model ID"].str.lower().str.contains(s)
-            | filtered_df["Provider"].str.lower().str.contains(s)
-        ]
-
-# ---- Export filtered results to sidebar ----
-if not filtered_df.empty:
-    csv_data = filtered_df.to_csv(index=False)
-    st.sidebar.download_button("Download CSV", csv_data, "models.csv", "text/csv")
-    json_data = filtered_df.to_json(orient="records")
-    st.sidebar.download_button("Download JSON", json_data, "models.json", "application/json")
-
-# Provider distribution chart
-st.subheader("Provider Distribution")
-if not filtered_df.empty:
-    pd_counts = filtered_df["Provider"].value_counts().rename_axis("Provider").reset_index(name="Count")
-    st.bar_chart(data=pd_counts.set_index("Provider"))
-else:
-    st.write("No models to display.")
-
-# Interactive Models Table
-st.subheader("Available Models")
-if not filtered_df.empty:
-    if AGGRID_AVAILABLE:
-        gb = GridOptionsBuilder.from_dataframe(filtered_df)
-        gb.configure_selection("multiple", use_checkbox=True)
-        gb.configure_pagination(paginationAutoPageSize=True)
-        gb.configure_default_column(filterable=True, sortable=True, resizable=True)
-        grid_opts = gb.build()
-        grid_resp = AgGrid(
-            filtered_df,
-            gridOptions=grid_opts,
-            update_mode=GridUpdateMode.SELECTION_CHANGED,
-            theme="streamlit",
-            fit_columns_on_grid_load=True,
-        )
-        selected = [r.get("Model ID") for r in grid_resp.get("selected_rows", [])]
-        st.session_state["selected_models"] = selected
+def make_dataframe(models):
+    # One list per field: pandas takes column arrays directly instead of
+    # parsing every model dict (with its nested blocks) row by row
+    frame = pd.DataFrame({col: [m.get(col) for m in models] for col in _MODEL_COLUMNS})
+    if frame.empty:
+        return pd.DataFrame()
+    free = free_or_preview_mask(models)
+    frame = frame[free].reset_index(drop=True)
+    free_models = [m for m, keep in zip(models, free) if keep]
+    descriptions = frame["description"].fillna("").tolist()
+    names = frame["name"].fillna("").tolist()
+    # Heuristics are config-driven per model; everything else is column-wise
+    specs = [
+        extract_specialties(d, a if isinstance(a, dict) else {})
+        for d, a in zip(descriptions, frame["architecture"])
+    ]
+    # One pass packs each model's specialties into bits; the flags are masks
+    cap_bits = np.fromiter(
+        (sum(_CAP_BITS.get(spec, 0) for spec in sp) for sp in specs), np.int64, len(specs)
+    )
+    has_code = (cap_bits & _CAP_BITS["coding"]) != 0
+    has_reason = (cap_bits & _CAP_BITS["reasoning"]) != 0
+    has_tools = (cap_bits & _CAP_BITS["tool_calling"]) != 0
+    params = [extract_params(n, d) for n, d in zip(names, descriptions)]
+    ids = frame["id"].fillna("")
+    if len(ids) < _SMALL_TABLE:
+        prefixes = [i.split("/", 1)[0] for i in ids]
+        providers = [_PROVIDER_MAP.get(p.lower(), p.capitalize()) for p in prefixes]
     else:
-        # Fallback without AgGrid
-        df_sel = filtered_df.copy()
-        if "Select" not in df_sel.columns:
-            df_sel.insert(0, "Select", False)
-        edited = st.data_editor(
-            df_sel,
-            column_config={
-                "Select": st.column_config.CheckboxColumn("Select", width="small"),
-            },
-            hide_index=True,
-            use_container_width=True,
-            key="fallback_table",
-        )
+        prefixes = ids.str.split("/", n=1).str[0]
+        providers = prefixes.str.lower().map(_PROVIDER_MAP).fillna(prefixes.str.capitalize())
+    created = pd.to_datetime(pd.to_numeric(frame["created"], errors="coerce"), unit="s")
+    now_ts = time.time()
+    scores = np.array([
+        round(calculate_effectiveness(m, specialties=sp, params=p or 0, now_ts=now_ts), 1)
+        for m, sp, p in zip(free_models, specs, params)
+    ])
+    # Best first; a stable argsort keeps API order among equal scores, and
+    # reordering the column arrays up front avoids sorting a built frame
+    order = np.argsort(-scores, kind="stable")
+    columns = {
+        "Provider": np.asarray(providers, dtype=object),
+        "Name": np.asarray(names, dtype=object),
+        "Model ID": ids.to_numpy(),
+        # Numeric so it sorts as a number; None (unknown) becomes NaN
+        "Params": np.array([p or np.nan for p in params], dtype=float),
+        "Score": scores,
+        "Release": created.dt.strftime("%Y-%m-%d").fillna("N/A").to_numpy(),
+        "Capabilities": _CAP_LABELS[cap_bits],
+        "_code": has_code,
+        "_reason": has_reason,
+        "_tools": has_tools,
+    }
+    df = pd.DataFrame({col: values[order] for col, values in columns.items()})
+    # Lowercased search text; the unit separator keeps matches within one field
+    df["_haystack"] = (df["Name"] + "\x1f" + df["Model ID"] + "\x1f" + df["Provider"]).str.lower()
+    _arrow_strings(df)
+    # Few distinct values per column: store codes plus a small lookup
+    for col in ["Provider", "Capabilities"]:
+        df[col] = df[col].astype("category")
+    return df
+
+# On-disk table cache so a restarted server can skip the rebuild
+_DF_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "openrouter")
+# Scores include a recency bonus, so cached tables expire after a day
+_DF_CACHE_TTL = 24 * 3600
+# Bump when make_dataframe's columns, dtypes or heuristics change to orphan old files
+_DF_SCHEMA = 4
+
+def load_or_build_df(models):
+    """Return the table from ~/.cache/openrouter when the catalog and heuristics match."""
+    # Keyed on the full projected catalog, so any field change (pricing,
+    # name, description, ...) rebuilds; hashing costs far less than the build
+    payload = json.dumps([_DF_SCHEMA, models, CONFIG], sort_keys=True, default=str)
+    digest = hashlib.sha1(payload.encode()).hexdigest()[:16]
+    path = os.path.join(_DF_CACHE_DIR, f"models-{digest}.parquet")
+    try:
+        if time.time() - os.path.getmtime(path) < _DF_CACHE_TTL:
+            return _arrow_strings(pd.read_parquet(path))
+    except (OSError, ImportError, ValueError):
+        pass
+    df = make_dataframe(models)
+    if not df.empty:
         try:
-            selected = edited[edited["Select"] == True]["Model ID"].tolist()
+            os.makedirs(_DF_CACHE_DIR, exist_ok=True)
+            df.to_parquet(path, index=False)
+        except (OSError, ImportError, ValueError):
+            return df
+        # A new digest supersedes every older table
+        for stale in glob.glob(os.path.join(_DF_CACHE_DIR, "models-*.parquet")):
+            if stale != path:
+                try:
+                    os.unlink(stale)
+                except OSError:
+                    pass
+    return df
+
+@st.cache_data(ttl=300, show_spinner="Loading models...")
+def load_catalog(api_key):
+    """Fetch the catalog and build the table once per TTL and API key.
+
+    Returns (total, free_count, relevant_count, df). Only the DataFrame is
+    cached, so reruns never copy the raw list of nested model dicts.
+    """
+    models = fetch_all_models(api_key)
+    df = load_or_build_df(models)
+    if df.empty:
+        return len(models), 0, 0, df
+    relevant = df["_code"] | df["_reason"] | df["_tools"]
+    return len(models), len(df), int(relevant.sum()), df
+
+# Fetch & cache models; the first fetch runs in the background so the
+# header and card skeletons paint before the API answers. The saved key is
+# part of the cache key, so saving a new one refetches.
+saved_key = os.getenv("OPENROUTER_API_KEY")
+if refresh:
+    load_catalog.clear()
+    st.session_state.pop("_catalog_ready", None)
+    st.session_state.pop("_fetch_future", None)
+if not st.session_state.get("_catalog_ready"):
+    if "_fetch_future" not in st.session_state:
+        st.session_state["_fetch_future"] = _fetch_executor().submit(load_catalog, saved_key)
+    if not st.session_state["_fetch_future"].done():
+        render_metrics("…", "…", "…")
+        st.caption("Loading models...")
+        time.sleep(0.1)
+        st.rerun()
+    # The future only gates the first paint; keep no payload in session_state
+    del st.session_state["_fetch_future"]
+    st.session_state["_catalog_ready"] = True
+n_total, n_free, n_relevant, df = load_catalog(saved_key)
+if not n_total:
+    # Don't pin a failed fetch for the whole TTL; retry on the next rerun
+    load_catalog.clear()
+
+# Metrics cards
+render_metrics(n_total, n_free, n_relevant)
+st.caption(f"Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+# ---- Panel helpers ----
+@st.cache_data(show_spinner=False)
+def to_csv_bytes(df):
+    """CSV export payload, reused across reruns while the filtered table is unchanged."""
+    return df.drop(columns=_HELPER_COLUMNS).to_csv(index=False).encode()
+
+@st.cache_data(show_spinner=False)
+def to_json_bytes(df):
+    """JSON export payload, reused across reruns while the filtered table is unchanged."""
+    return df.drop(columns=_HELPER_COLUMNS).to_json(orient="records").encode()
+
+@st.cache_data(show_spinner=False)
+def provider_counts(providers):
+    """Models per provider, indexed by provider name, for the distribution chart."""
+    counts = providers.value_counts()
+    # Categorical value_counts also lists providers filtered out entirely
+    return counts[counts > 0].rename("Count")
+
+@st.cache_data(show_spinner=False)
+def build_env_txt(sel):
+    """.env lines for the selected model ids, keyed on the selection tuple."""
+    return "\n".join(f"OPENROUTER_MODEL_{i+1}={m}" for i, m in enumerate(sel))
+
+# Tables larger than this are sent to the grid one server-side page at a time
+_GRID_PAGE_SIZE = 500
+
+@st.cache_data(show_spinner=False)
+def grid_options(schema_df, paged=False):
+    """Grid options depend only on the columns, so build them once per schema."""
+    gb = GridOptionsBuilder.from_dataframe(schema_df)
+    gb.configure_selection("multiple", use_checkbox=True)
+    gb.configure_pagination(paginationAutoPageSize=True)
+    # Client-side sort/filter would only see the current page; rows arrive pre-sorted by Score
+    gb.configure_default_column(filterable=not paged, sortable=not paged, resizable=True)
+    # AG Grid evaluates string formatters as expressions, which keeps this JSON-safe
+    gb.configure_column("Params", valueFormatter="value == null ? 'N/A' : value + 'B'")
+    # Rows keyed by model id, so a filter change updates rows in place and keeps the selection
+    gb.configure_grid_options(getRowId=JsCode("function (params) { return params.data['Model ID']; }"))
+    # Round-trip through JSON: the builder's nested defaultdicts can't be pickled.
+    # JsCode becomes its marker string, which the grid rebuilds with allow_unsafe_jscode.
+    return json.loads(json.dumps(gb.build(), default=lambda o: o.js_code))
+
+# ---- Models panel ----
+@st.fragment
+def models_panel(df):
+    """Filters, chart, table and exports; a filter change reruns only this panel."""
+    # Filter widgets
+    if "min_score" not in st.session_state:
+        st.session_state.min_score = 8.5
+    if "capabilities" not in st.session_state:
+        st.session_state.capabilities = ["Code", "Reason", "Tools"]
+    if "search" not in st.session_state:
+        st.session_state.search = ""
+    st.subheader("🔍 Filters")
+    # A form batches filter edits into a single rerun on Apply
+    with st.form("filters"):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            min_score = st.slider("Minimum Effectiveness Score", 0.0, 10.0, st.session_state.min_score, 0.1, key="min_score_slider")
+        with col2:
+            capabilities = st.multiselect(
+                "Capabilities",
+                ["Code", "Reason", "Tools"],
+                default=st.session_state.capabilities,
+                key="capabilities_select"
+            )
+        with col3:
+            search = st.text_input("Search models", value=st.session_state.search, key="search_input")
+        st.form_submit_button("Apply")
+
+    # Apply filters as one combined mask and a single selection
+    filtered_df = df
+    if not df.empty:
+        mask = df["Score"].to_numpy() >= min_score
+        # Capability filter
+        if capabilities:
+            # One 2-D bool block reduced row-wise instead of a Python OR loop
+            mask &= df[[_CAP_KEYS[cap] for cap in capabilities]].to_numpy().any(axis=1)
+        # Search filter
+        if search:
+            s = search.lower()
+            haystack = df["_haystack"]
+            if len(haystack) < _SMALL_TABLE:
+                # A literal `in` needs no regex engine; fromiter skips list->array inference
+                mask &= np.fromiter((s in h for h in haystack.to_numpy()), bool, len(haystack))
+            else:
+                mask &= haystack.str.contains(s, regex=False, na=False).to_numpy()
+        filtered_df = df[mask]
+
+    # Provider distribution chart, collapsed by default. Streamlit runs an
+    # expander's body even when closed, so a toggle gates the chart work.
+    with st.expander("Provider Distribution"):
+        if st.toggle("Show chart", key="show_provider_chart"):
+            if not filtered_df.empty:
+                st.bar_chart(provider_counts(filtered_df["Provider"]))
+            else:
+                st.write("No models to display.")
+
+    # Interactive Models Table
+    st.subheader("Available Models")
+    if not filtered_df.empty:
+        if AGGRID_AVAILABLE:
+            n_pages = -(-len(filtered_df) // _GRID_PAGE_SIZE)
+            paged = n_pages > 1
+            # Only display columns are serialized for the browser
+            grid_df = filtered_df.drop(columns=_HELPER_COLUMNS)
+            if paged:
+                page = st.number_input(f"Page (of {n_pages})", min_value=1, max_value=n_pages, value=1)
+                start = (page - 1) * _GRID_PAGE_SIZE
+                grid_df = grid_df.iloc[start:start + _GRID_PAGE_SIZE]
+            grid_resp = AgGrid(
+                grid_df,
+                gridOptions=grid_options(grid_df.head(0), paged),
+                allow_unsafe_jscode=True,
+                update_mode=GridUpdateMode.SELECTION_CHANGED,
+                theme="streamlit",
+                fit_columns_on_grid_load=True,
+                key="models_grid",
+            )
+            # streamlit-aggrid >= 1.0 returns a DataFrame (or None), older releases a list
+            rows = grid_resp["selected_rows"]
+            if isinstance(rows, pd.DataFrame):
+                selected = rows["Model ID"].tolist()
+            else:
+                selected = [r.get("Model ID") for r in rows or []]
+            if paged:
+                # Keep selections made on other pages
+                page_ids = set(grid_df["Model ID"])
+                selected = [m for m in st.session_state["selected_models"] if m not in page_ids] + selected
             st.session_state["selected_models"] = selected
-        except Exception:
-            pass
-else:
-    st.info("No models match the filters.")
-
-# Display selected models in .env format
-sel = st.session_state.get("selected_models", [])
-if sel:
-    env_txt = "\n".join([f"OPENROUTER_MODEL_{i+1}={m}" for i, m in enumerate(sel)])
-    st.subheader("Selected Models (.env)")
-    st.code(env_txt, language="bash")
-    st.download_button("Download .env", env_txt, "models.env", "text/plain")
\ No newline at end of file
+        else:
+            # Fallback without AgGrid
+            # Drop helper columns rather than hiding them, so Arrow never ships them
+            df_sel = filtered_df.drop(columns=_HELPER_COLUMNS)
+            if "Select" not in df_sel.columns:
+                df_sel.insert(0, "Select", False)
+            edited = st.data_editor(
+                df_sel,
+                column_config={
+                    "Select": st.column_config.CheckboxColumn("Select", width="small"),
+                    "Params": st.column_config.NumberColumn("Params", format="%gB"),
+                },
+                hide_index=True,
+                use_container_width=True,
+                key="fallback_table",
+            )
+            # One boolean index over the checkbox column
+            sel_mask = edited["Select"].to_numpy(dtype=bool)
+            st.session_state["selected_models"] = edited["Model ID"].to_numpy()[sel_mask].tolist()
+    else:
+        st.info("No models match the filters.")
+
+    # Export filtered results
+    if not filtered_df.empty:
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button("Download CSV", to_csv_bytes(filtered_df), "models.csv", "text/csv")
+        with col2:
+            st.download_button("Download JSON", to_json_bytes(filtered_df), "models.json", "application/json")
+
+    # Display selected models in .env format
+    sel = st.session_state.get("selected_models", [])
+    if sel:
+        env_txt = build_env_txt(tuple(sel))
+        st.subheader("Selected Models (.env)")
+        st.code(env_txt, language="bash")
+        st.download_button("Download .env", env_txt, "models.env", "text/plain")
+
+models_panel(df)
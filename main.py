@@ -2,27 +2,123 @@ import os
 import json
 from dotenv import load_dotenv
 import json
-import requests
+import gzip
 import re
-from typing import Dict, List, Optional
+import tempfile
+import time
+import zlib
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
 # Load environment variables
 load_dotenv()
 API_URL = "https://openrouter.ai/api/v1/models"
 API_KEY = os.getenv("OPENROUTER_API_KEY")
 # Load heuristics configuration
 CONFIG_PATH = os.path.join(os.path.dirname(__file__), "config", "heuristics.json")
-with open(CONFIG_PATH, "r") as _f:
-    CONFIG = json.load(_f)
+with open(CONFIG_PATH, "rb") as _f:
+    CONFIG = _json_loads(_f.read())
+
+# Shared default for missing dict fields; never mutate it
+_EMPTY_DICT = {}
+
+# Compile config-driven patterns once at import instead of per model.
+# Case-insensitive so "70 Billion" matches like "70 billion" does.
+_PARAM_PATTERNS = tuple(
+    re.compile(p, re.IGNORECASE) for p in CONFIG.get("extract_params", {}).get("patterns", [])
+)
+_DIGIT = re.compile(r"\d")
+# One alternation per specialty replaces the inner keyword loop; it is
+# matched against already-lowercased text, so the keywords are lowered too
+_SPECIALTY_PATTERNS = {
+    category: re.compile("|".join(re.escape(kw.lower()) for kw in cfg["keywords"]))
+    for category, cfg in CONFIG.get("specialties", {}).items()
+    if cfg.get("keywords")
+}
+
+def _build_automaton(tagged_words):
+    """Build an Aho-Corasick automaton mapping each lowered word to its tags.
+
+    Returns None when there are no words, since an empty trie cannot be scanned.
+    """
+    tags = {}
+    for word, tag in tagged_words:
+        tags.setdefault(word.lower(), []).append(tag)
+    if not tags:
+        return None
+    automaton = ahocorasick.Automaton()
+    for word, word_tags in tags.items():
+        automaton.add_word(word, tuple(word_tags))
+    automaton.make_automaton()
+    return automaton
+
+# Keyword lists lowercased once here instead of on every comparison
+_EFF_CFG = CONFIG.get("effectiveness", {})
+_TOOL_ARCH_KEYWORDS = tuple(
+    kw.lower() for kw in CONFIG.get("specialties", {}).get("tool_calling", {}).get("architecture_keywords", [])
+)
+_ARCH_KEYWORDS = tuple(kw.lower() for kw in _EFF_CFG.get("architecture", {}).get("keywords", []))
+# Keyword sections scanned over the lowercased name + description text,
+# tagged with (section, keyword) so one pass yields every match
+_QUANT_TAGS = tuple(("quantization", p.lower()) for p in _EFF_CFG.get("quantization", {}).get("patterns", []))
+_FAMILY_BONUSES = tuple((("family", f.lower()), b) for f, b in _EFF_CFG.get("family_bonus", {}).items())
+_MULTIMODAL_TAGS = tuple(("multimodal", k.lower()) for k in _EFF_CFG.get("multimodal", {}).get("keywords", []))
+_TEXT_KEYWORDS = _QUANT_TAGS + tuple(tag for tag, _ in _FAMILY_BONUSES) + _MULTIMODAL_TAGS
+if AHOCORASICK_AVAILABLE:
+    # One automaton for every specialty, each keyword tagged with its category
+    _SPECIALTY_AUTOMATON = _build_automaton(
+        (kw, category)
+        for category, cfg in CONFIG.get("specialties", {}).items()
+        for kw in cfg.get("keywords", [])
+    )
+    _TEXT_AUTOMATON = _build_automaton((tag[1], tag) for tag in _TEXT_KEYWORDS)
 
+def _specialty_keyword_hits(text: str) -> set:
+    """Return the specialty categories with a keyword in lowercased ``text``."""
+    if AHOCORASICK_AVAILABLE:
+        if _SPECIALTY_AUTOMATON is None:
+            return set()
+        return {category for _, categories in _SPECIALTY_AUTOMATON.iter(text) for category in categories}
+    return {category for category, pattern in _SPECIALTY_PATTERNS.items() if pattern.search(text)}
+
+def _text_keyword_hits(text: str) -> set:
+    """Return the (section, keyword) tags found in lowercased ``text``."""
+    if AHOCORASICK_AVAILABLE:
+        if _TEXT_AUTOMATON is None:
+            return set()
+        return {tag for _, tags in _TEXT_AUTOMATON.iter(text) for tag in tags}
+    return {tag for tag in _TEXT_KEYWORDS if tag[1] in text}
+
+def _arch_text(architecture: Dict) -> str:
+    """Lowercased architecture values for keyword checks, without the dict repr."""
+    return " ".join(str(v) for v in architecture.values()).lower()
+
+@lru_cache(maxsize=4096)
 def extract_params(name: str, description: str) -> Optional[float]:
-    """Extract parameter count in billions from model name or description."""
+    """Extract parameter count in billions from model name or description.
+
+    Memoized: both arguments are plain strings and refreshes see the same models.
+    """
+    # A count is float(group(1)), which needs a digit, so one cheap scan
+    # rules out texts before any of the configured patterns run
+    texts = [t for t in (name or "", description or "") if _DIGIT.search(t)]
     # Extract based on configured regex patterns
-    patterns = CONFIG.get("extract_params", {}).get("patterns", [])
-    for pattern in patterns:
-        for text in (name or "", description or ""):
-            if match := re.search(pattern, text):
+    for pattern in _PARAM_PATTERNS:
+        for text in texts:
+            if match := pattern.search(text):
                 try:
                     return float(match.group(1))
                 except (ValueError, TypeError):
@@ -31,34 +127,50 @@ def extract_params(name: str, description: str) -> Optional[float]:
 
 def extract_specialties(description: str, architecture: Dict) -> List[str]:
     """Extract key specialties from model description and architecture."""
+    # Memoized on the fields actually checked, since dicts are not hashable
+    architecture = architecture or {}
+    instruct_type = architecture.get("instruct_type")
+    if not isinstance(instruct_type, str):
+        instruct_type = None
+    return list(_extract_specialties(description or "", instruct_type, _arch_text(architecture)))
+
+@lru_cache(maxsize=4096)
+def _extract_specialties(description: str, instruct_type: Optional[str], arch_str: str) -> Tuple[str, ...]:
     specialties = []
     spec_cfg = CONFIG.get("specialties", {})
-    text = (description or "").lower()
-    arch_str = str(architecture or {}).lower()
-    # Check keywords per specialty
-    for category, cfg in spec_cfg.items():
-        for kw in cfg.get("keywords", []):
-            if kw.lower() in text:
-                specialties.append(category)
-                break
+    text = description.lower()
+    # Check keywords per specialty; one scan, reported in config order
+    hits = _specialty_keyword_hits(text)
+    for category in _SPECIALTY_PATTERNS:
+        if category in hits:
+            specialties.append(category)
     # Additionally detect tool_calling via architecture config
     tool_cfg = spec_cfg.get("tool_calling", {})
     # Instruct types support
     for inst in tool_cfg.get("instruct_types", []):
-        if architecture.get("instruct_type") == inst:
+        if instruct_type == inst:
             if "tool_calling" not in specialties:
                 specialties.append("tool_calling")
             break
     # Architecture keywords support
-    for arch_kw in tool_cfg.get("architecture_keywords", []):
-        if arch_kw.lower() in arch_str:
+    for arch_kw in _TOOL_ARCH_KEYWORDS:
+        if arch_kw in arch_str:
             if "tool_calling" not in specialties:
                 specialties.append("tool_calling")
             break
-    return specialties
+    return tuple(specialties)
+
+def calculate_effectiveness(model: Dict, *, specialties: Optional[List[str]] = None, params: Optional[float] = None, now_ts: Optional[float] = None) -> float:
+    """Calculate a rough effectiveness score (0-10) based on various factors.
 
-def calculate_effectiveness(model: Dict) -> float:
-    """Calculate a rough effectiveness score (0-10) based on various factors."""
+    Pass ``specialties`` and ``params`` when already extracted to skip
+    re-running the keyword scans and regexes, and ``now_ts`` to score a
+    whole batch against one clock reading.
+    """
+    # Read the shared model fields once; missing ones share read-only defaults
+    name = model.get("name") or ""
+    description = model.get("description") or ""
+    arch = model.get("architecture") or _EMPTY_DICT
     eff_cfg = CONFIG.get("effectiveness", {})
     score = eff_cfg.get("base_score", 0.0)
     # Context length bonuses
@@ -69,7 +181,6 @@ def calculate_effectiveness(model: Dict) -> float:
             break
     # Architecture support bonus
     arch_cfg = eff_cfg.get("architecture", {})
-    arch = model.get("architecture", {})
     added = False
     for inst in arch_cfg.get("instruct_types", []):
         if arch.get("instruct_type") == inst:
@@ -77,22 +188,25 @@ def calculate_effectiveness(model: Dict) -> float:
             added = True
             break
     if not added:
-        arch_str = str(arch).lower()
-        for kw in arch_cfg.get("keywords", []):
-            if kw.lower() in arch_str:
+        arch_str = _arch_text(arch)
+        for kw in _ARCH_KEYWORDS:
+            if kw in arch_str:
                 score += arch_cfg.get("bonus", 0.0)
                 break
     # Preview models bonus
     if "preview" in (model.get("id", "") or "").lower():
         score += eff_cfg.get("preview_bonus", 0.0)
     # Size-based bonuses
-    params = extract_params(model.get("name", ""), model.get("description", "")) or 0
+    if params is None:
+        params = extract_params(name, description) or 0
     for sz in eff_cfg.get("size", []):
         if params >= sz.get("min", 0):
             score += sz.get("bonus", 0.0)
             break
     # Specialty bonuses
-    specs = extract_specialties(model.get("description", ""), model.get("architecture", {}))
+    specs = specialties
+    if specs is None:
+        specs = extract_specialties(description, arch)
     sb = eff_cfg.get("specialty_bonus", {})
     # Specialty bonuses
     if "coding" in specs and "reasoning" in specs:
@@ -105,7 +219,9 @@ def calculate_effectiveness(model: Dict) -> float:
     created_ts = model.get("created")
     if isinstance(created_ts, (int, float)):
         try:
-            days_ago = (datetime.now() - datetime.fromtimestamp(created_ts)).days
+            if now_ts is None:
+                now_ts = time.time()
+            days_ago = int((now_ts - created_ts) // 86400)
             for rec in rec_cfg:
                 if days_ago <= rec.get("max_days", 0):
                     score += rec.get("bonus", 0.0)
@@ -115,25 +231,21 @@ def calculate_effectiveness(model: Dict) -> float:
 
     # Quantization penalty for smaller/quantized variants
     quant_cfg = eff_cfg.get("quantization", {})
-    text = ((model.get("name", "") or "") + " " + (model.get("description", "") or "")).lower()
-    for pat in quant_cfg.get("patterns", []):
-        if pat.lower() in text:
-            score -= quant_cfg.get("penalty", 0.0)
-            break
+    text = (name + " " + description).lower()
+    hits = _text_keyword_hits(text)
+    if any(tag in hits for tag in _QUANT_TAGS):
+        score -= quant_cfg.get("penalty", 0.0)
 
     # Family bonus for known strong model families
-    fam_cfg = eff_cfg.get("family_bonus", {})
-    for fam, bonus in fam_cfg.items():
-        if fam.lower() in text:
+    for tag, bonus in _FAMILY_BONUSES:
+        if tag in hits:
             score += bonus
             break
 
     # Multimodal capability bonus
     mm_cfg = eff_cfg.get("multimodal", {})
-    for kw in mm_cfg.get("keywords", []):
-        if kw.lower() in text:
-            score += mm_cfg.get("bonus", 0.0)
-            break
+    if any(tag in hits for tag in _MULTIMODAL_TAGS):
+        score += mm_cfg.get("bonus", 0.0)
 
     # Clamp score to [0, 10]
     return min(10, max(0, score))
@@ -145,6 +257,9 @@ def format_release_date(created: int) -> str:
     except (TypeError, ValueError):
         return 'N/A'
 
+# Price values that are zero without parsing; 0 also matches 0.0 and False
+_ZERO_PRICES = frozenset({0, "0", "0.0"})
+
 def is_free_or_preview(model: Dict) -> bool:
     """Check if model is free or preview version."""
     model_id = (model.get('id') or '').lower()
@@ -155,17 +270,46 @@ def is_free_or_preview(model: Dict) -> bool:
     if ':free' in model_id:
         return True
     # Zero pricing
-    pricing = model.get('pricing') or {}
+    pricing = model.get('pricing') or _EMPTY_DICT
     if isinstance(pricing, dict):
         try:
-            if all(float(v) == 0 for v in pricing.values() if v is not None):
+            # One short-circuiting pass; exact zeros like "0" skip float()
+            if all(v in _ZERO_PRICES or float(v) == 0 for v in pricing.values() if v is not None):
                 return True
         except (ValueError, TypeError):
             pass
     return False
 
-def fetch_all_models(retries: int = 3, backoff: float = 1.0, timeout: tuple = (5, 30)) -> List[Dict]:
-    """Fetch all models with retry/backoff. Returns list of model dicts."""
+def free_or_preview_mask(models: List[Dict]):
+    """Vectorized is_free_or_preview: a numpy bool array, one entry per model."""
+    # pandas is only needed by the table builder, so the CLI never imports it
+    import numpy as np
+    import pandas as pd
+    ids = pd.Series([m.get("id") for m in models], dtype=object).fillna("").astype(str).str.lower()
+    names = pd.Series([m.get("name") for m in models], dtype=object).fillna("").astype(str).str.lower()
+    mask = (
+        ids.str.contains("preview", regex=False)
+        | names.str.contains("preview", regex=False)
+        | ids.str.contains(":free", regex=False)
+    )
+    # Zero pricing: every non-null price parses to 0; a non-dict pricing never counts
+    pricing = [m.get("pricing") or _EMPTY_DICT for m in models]
+    is_dict = np.fromiter((isinstance(p, dict) for p in pricing), bool, len(pricing))
+    prices = pd.DataFrame.from_records(
+        [p if isinstance(p, dict) else _EMPTY_DICT for p in pricing], index=ids.index
+    )
+    numeric = prices.apply(pd.to_numeric, errors="coerce")
+    zero = (numeric.eq(0) | prices.isna()).all(axis=1).to_numpy() & is_dict
+    return mask.to_numpy() | zero
+
+# Model fields used by the scoring heuristics and the table
+_MODEL_FIELDS = ("id", "name", "description", "architecture", "context_length", "pricing", "created")
+
+@lru_cache(maxsize=None)
+def _session(retries: int, backoff: float):
+    """Shared requests.Session per retry policy, so refreshes reuse pooled keep-alive connections."""
+    # requests is imported on first fetch, which runs off the first-paint path
+    import requests
     from requests.adapters import HTTPAdapter
     from urllib3.util.retry import Retry
     session = requests.Session()
@@ -175,16 +319,93 @@ def fetch_all_models(retries: int = 3, backoff: float = 1.0, timeout: tuple = (5
         status_forcelist=[429, 500, 502, 503, 504],
         allowed_methods=["GET"],
     )
-    adapter = HTTPAdapter(max_retries=retry_strategy)
+    # Small pool: one host, but room for a few concurrent refreshes or pages
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retry_strategy)
     session.mount("https://", adapter)
     session.mount("http://", adapter)
-    headers = {"Authorization": f"Bearer {API_KEY}"}
+    return session
+
+# Last fetched catalog plus its HTTP validators, for conditional requests
+CATALOG_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "openrouter", "models.json.gz")
+
+def _load_cached_catalog() -> Tuple[Dict, Optional[List[Dict]]]:
+    """Return (validators, models) from the on-disk catalog, or ({}, None)."""
+    try:
+        with gzip.open(CATALOG_CACHE_PATH, "rb") as f:
+            cached = _json_loads(f.read())
+        # A copy projected to other fields would be missing data
+        if cached["fields"] != list(_MODEL_FIELDS):
+            return {}, None
+        if not isinstance(cached["data"], list):
+            return {}, None
+        return cached["validators"], cached["data"]
+    except (OSError, EOFError, zlib.error, ValueError, KeyError, TypeError):
+        # A truncated or corrupt copy is just a cache miss
+        return {}, None
+
+def _save_cached_catalog(validators: Dict, models: List[Dict]) -> None:
+    """Write the catalog atomically; without validators it could never be reused."""
+    if not validators:
+        return
+    cache_dir = os.path.dirname(CATALOG_CACHE_PATH)
+    tmp_path = None
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb") as f:
+            payload = {"fields": list(_MODEL_FIELDS), "validators": validators, "data": models}
+            f.write(json.dumps(payload, separators=(",", ":")).encode())
+        os.replace(tmp_path, CATALOG_CACHE_PATH)
+    except (OSError, TypeError, ValueError):
+        # A failed cache write must never cost the caller the fetched models
+        if tmp_path and os.path.exists(tmp_path):
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+
+def fetch_all_models(api_key: Optional[str] = None, retries: int = 3, backoff: float = 1.0, timeout: tuple = (5, 30)) -> List[Dict]:
+    """Fetch all models with retry/backoff. Returns list of model dicts.
+
+    Uses ``api_key`` when given, else the key loaded from the environment at import.
+    The last catalog is kept in ``CATALOG_CACHE_PATH`` and revalidated with
+    If-None-Match / If-Modified-Since, so an unchanged catalog is not re-sent.
+    """
+    session = _session(retries, backoff)
+    # Per-request header rather than session state: the key can change between calls
+    headers = {"Authorization": f"Bearer {api_key if api_key is not None else API_KEY}"}
+    validators, cached = _load_cached_catalog()
+    if cached is not None:
+        if "etag" in validators:
+            headers["If-None-Match"] = validators["etag"]
+        if "last_modified" in validators:
+            headers["If-Modified-Since"] = validators["last_modified"]
     try:
         resp = session.get(API_URL, headers=headers, timeout=timeout)
+        if resp.status_code == 304 and cached is not None:
+            return cached
         resp.raise_for_status()
-        data = resp.json().get("data", [])
+        data = _json_loads(resp.content).get("data", [])
         if isinstance(data, list):
-            return data
+            # Keep only the fields the explorer reads; the rest of each
+            # record (endpoints, limits, parameters) is dropped right away
+            models = [
+                {k: m[k] for k in _MODEL_FIELDS if k in m}
+                for m in data
+                if isinstance(m, dict)
+            ]
+            _save_cached_catalog(
+                {
+                    key: value
+                    for key, value in (
+                        ("etag", resp.headers.get("ETag")),
+                        ("last_modified", resp.headers.get("Last-Modified")),
+                    )
+                    if value
+                },
+                models,
+            )
+            return models
     except Exception:
         pass
     return []